@@ -7,9 +7,12 @@ import httpx
 from enum import Enum
 
 from utils import transcript_analyser
+from utils.s3_utils import get_optional_file_from_s3, store_file_in_s3
+from utils.transcript_format import TranscriptFormat, decode_segments, render_segments
 
 from fastapi import Depends
 from auth import api_key_auth
+from lifecycle import get_http_client
 
 
 class ActionType(str, Enum):
@@ -39,6 +42,7 @@ class TicketAction(BaseModel):
     action_details: ActionDetails
     confidence_score: float
     transcript_context: str
+    transcript_segment_ids: List[int] = []
     reasoning: str
 
 
@@ -54,44 +58,82 @@ class TranscriptAnalyzeRequest(BaseModel):
     transcript_url: str
     pod_members: List[Dict]
     sprint_details: List[Dict]
+    transcript_format: TranscriptFormat = TranscriptFormat.TEXT
+    sprint_context_encoding: transcript_analyser.SprintContextEncoding = (
+        transcript_analyser.SprintContextEncoding.FULL
+    )
+    reuse_previous_analysis: bool = True
 
 
 router = APIRouter()
 
-from dotenv import load_dotenv
-
-load_dotenv()
+SNAPSHOT_PREFIX = "analysis_snapshots/"
 
 
 async def download_file(s3_url: str) -> bytes:
     """
     Downloads a file from S3 using the provided URL using httpx.
     """
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(s3_url, timeout=30)  # 30 seconds timeout
-            response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-            return response.content
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=ResponseSchema(
-                    success=False,
-                    code="HTTP_ERROR",
-                    message=f"HTTP error: {e.response.status_code} - {e.response.text}",
-                    status_code=e.response.status_code,
-                ).json(),
-            )
-        except httpx.RequestError as e:
-            raise HTTPException(
+    client = get_http_client()
+    try:
+        response = await client.get(s3_url, timeout=30)  # 30 seconds timeout
+        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
+        return response.content
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ResponseSchema(
+                success=False,
+                code="HTTP_ERROR",
+                message=f"HTTP error: {e.response.status_code} - {e.response.text}",
+                status_code=e.response.status_code,
+            ).json(),
+        )
+    except httpx.RequestError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ResponseSchema(
+                success=False,
+                code="REQUEST_ERROR",
+                message=f"Request error: {e}",
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=ResponseSchema(
-                    success=False,
-                    code="REQUEST_ERROR",
-                    message=f"Request error: {e}",
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                ).json(),
-            )
+            ).json(),
+        )
+
+
+async def load_analysis_snapshot(snapshot_file_name: str) -> Optional[dict]:
+    """
+    Load the stored analysis snapshot of a transcript. The snapshot is only an optimisation,
+    so any read or parse failure (missing key, AccessDenied, corrupt object) returns None.
+    """
+    try:
+        snapshot_content = await get_optional_file_from_s3(SNAPSHOT_PREFIX, snapshot_file_name)
+        if not snapshot_content:
+            return None
+        snapshot = json.loads(snapshot_content)
+        if not all(key in snapshot for key in ("pod_members", "sprint_details", "actions")):
+            raise ValueError("snapshot is missing required keys")
+        return snapshot
+    except Exception as e:
+        print(f"Ignoring analysis snapshot '{snapshot_file_name}': {getattr(e, 'detail', e)}")
+        return None
+
+
+async def save_analysis_snapshot(snapshot_file_name: str, snapshot: dict):
+    """
+    Store the analysis snapshot of a transcript. A failed save only costs the next request
+    a full analysis, so it is logged instead of failing the current one.
+    """
+    try:
+        await store_file_in_s3(
+            prefix=SNAPSHOT_PREFIX,
+            file_name=snapshot_file_name,
+            file_content=json.dumps(snapshot).encode("utf-8"),
+        )
+    except Exception as e:
+        print(
+            f"Failed to store analysis snapshot '{snapshot_file_name}': {getattr(e, 'detail', e)}"
+        )
 
 
 @router.post(
@@ -107,14 +149,27 @@ async def analyze_transcript_endpoint(request: TranscriptAnalyzeRequest):
 
         # Download the file using the utility function
         file_content = await download_file(transcript_url)
-        transcription_text = file_content.decode("utf-8")
-
-        # Analyze the transcription
-        result = transcript_analyser.analyze_transcription(
+        if request.transcript_format == TranscriptFormat.SEGMENTS:
+            transcription_text = render_segments(decode_segments(file_content))
+        else:
+            transcription_text = file_content.decode("utf-8")
+
+        # Load the snapshot of the previous analysis of this transcript, if any
+        snapshot_file_name = f"{transcript_analyser.get_transcript_key(transcription_text)}.json"
+        snapshot = None
+        if request.reuse_previous_analysis:
+            snapshot = await load_analysis_snapshot(snapshot_file_name)
+
+        # Analyze the transcription, re-analyzing only tickets that changed since the snapshot
+        snapshot = transcript_analyser.analyze_transcription_incremental(
             transcription_text=transcription_text,
             pod_members=request.pod_members,
             sprint_details=request.sprint_details,
+            snapshot=snapshot,
+            encoding=request.sprint_context_encoding,
         )
+        await save_analysis_snapshot(snapshot_file_name, snapshot)
+        result = [dict(action) for action in snapshot["actions"]]
 
         # Create the map of ticket numbers to id
         ticket_number_to_id_map = {}
@@ -6,25 +6,34 @@ from fastapi import APIRouter, HTTPException, status
 from fastapi.responses import JSONResponse
 from utils.audio_transcriber import (
     transcribe_audio_gemini,
+    transcribe_audio_segments_gemini,
 )  # Import the transcribe_audio function
-from utils.s3_utils import store_file_in_s3
-from utils.download_google_meet_recordings import authenticate_drive, get_audio_path
+from utils.s3_utils import get_file_range_from_s3, get_optional_file_from_s3, store_file_in_s3
+from utils.download_google_meet_recordings import get_audio_path, get_drive_service
+from utils.voice_activity import map_to_original, trim_non_speech
+from utils.transcript_format import (
+    TranscriptFormat,
+    decode_segments,
+    encode_segments,
+    find_segment_at,
+    get_segment_byte_range,
+)
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 from fastapi import Depends
 from auth import api_key_auth
-
-from dotenv import load_dotenv
-
-load_dotenv()
+from lifecycle import get_http_client
 
 router = APIRouter()
 
+TRANSCRIPTS_PREFIX = "transcripts/"
+
 
 class AudioProcessRequest(BaseModel):
     file_uri: str
     log_id: str
+    transcript_format: TranscriptFormat = TranscriptFormat.TEXT
 
 
 class ResponseSchema(BaseModel):
@@ -33,35 +42,66 @@ class ResponseSchema(BaseModel):
     message: str
     status_code: int  # HTTP status code
     s3_url: Optional[str] = None
+    index_url: Optional[str] = None
+
+
+class SegmentsResponseSchema(BaseModel):
+    success: bool
+    code: str
+    message: str
+    status_code: int
+    body: Optional[List[dict]] = None
+
+
+def get_error_content(http_exception: HTTPException, schema=ResponseSchema) -> dict:
+    """
+    Response body for an HTTPException. Exceptions raised in this module carry a serialized
+    response schema as detail, those raised by the utils carry a plain message.
+    """
+    try:
+        return json.loads(http_exception.detail)
+    except (TypeError, ValueError):
+        if http_exception.status_code == status.HTTP_404_NOT_FOUND:
+            code = "NOT_FOUND"
+        elif http_exception.status_code >= status.HTTP_500_INTERNAL_SERVER_ERROR:
+            code = "INTERNAL_SERVER_ERROR"
+        else:
+            code = "HTTP_ERROR"
+        return schema(
+            success=False,
+            code=code,
+            message=str(http_exception.detail),
+            status_code=http_exception.status_code,
+        ).dict()
 
 
 async def download_file(file_uri: str) -> bytes:
     """Downloads a file from a given URI."""
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(file_uri, timeout=60)  # Set a timeout
-            response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-            return response.content
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(
+    client = get_http_client()
+    try:
+        response = await client.get(file_uri, timeout=60)  # Set a timeout
+        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
+        return response.content
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail=ResponseSchema(
+                success=False,
+                code="HTTP_ERROR",
+                message=f"HTTP error: {e.response.status_code} - {e.response.text}",
                 status_code=e.response.status_code,
-                detail=ResponseSchema(
-                    success=False,
-                    code="HTTP_ERROR",
-                    message=f"HTTP error: {e.response.status_code} - {e.response.text}",
-                    status_code=e.response.status_code,
-                ).json(),
-            )
-        except httpx.RequestError as e:
-            raise HTTPException(
+            ).json(),
+        )
+    except httpx.RequestError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ResponseSchema(
+                success=False,
+                code="REQUEST_ERROR",
+                message=f"Request error: {e}",
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=ResponseSchema(
-                    success=False,
-                    code="REQUEST_ERROR",
-                    message=f"Request error: {e}",
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                ).json(),
-            )
+            ).json(),
+        )
 
 
 @router.post("/process-audio/", response_model=ResponseSchema, dependencies=[Depends(api_key_auth)])
@@ -70,24 +110,47 @@ async def process_audio(request: AudioProcessRequest):
     Endpoint to process audio files, transcribe them, and return the storage URI.
     """
     try:
-        # Authenticate with Google Drive
-        service = authenticate_drive()
+        # Get the authenticated Google Drive service
+        service = get_drive_service()
 
         # Download the audio file from the provided URI
         audio_file_path = get_audio_path(service, request.file_uri)
-        transcript_file_name = f"{request.log_id}.txt"
 
-        # Transcribe the audio using the utility function
-        transcript = transcribe_audio_gemini(audio_file_path)
-
-        storage_uri = await store_file_in_s3(
-            prefix="transcripts/",
-            file_name=transcript_file_name,
-            file_content=transcript.encode("utf-8"),
-        )
+        # Cut silence and non-speech spans so only speech is uploaded for transcription
+        trimmed_audio_file_path, time_map = trim_non_speech(audio_file_path)
+        index_uri = None
+
+        if request.transcript_format == TranscriptFormat.SEGMENTS:
+            # Transcribe into speaker segments and store them with their offset index
+            segments = transcribe_audio_segments_gemini(trimmed_audio_file_path)
+            # Report timestamps relative to the original recording
+            for segment in segments:
+                segment["start"] = map_to_original(segment["start"], time_map)
+                segment["end"] = map_to_original(segment["end"], time_map)
+            transcript_content, transcript_index = encode_segments(segments)
+            storage_uri = await store_file_in_s3(
+                prefix=TRANSCRIPTS_PREFIX,
+                file_name=f"{request.log_id}.jsonl",
+                file_content=transcript_content,
+            )
+            index_uri = await store_file_in_s3(
+                prefix=TRANSCRIPTS_PREFIX,
+                file_name=f"{request.log_id}.index.json",
+                file_content=json.dumps(transcript_index).encode("utf-8"),
+            )
+        else:
+            # Transcribe the audio using the utility function
+            transcript = transcribe_audio_gemini(trimmed_audio_file_path)
+            storage_uri = await store_file_in_s3(
+                prefix=TRANSCRIPTS_PREFIX,
+                file_name=f"{request.log_id}.txt",
+                file_content=transcript.encode("utf-8"),
+            )
 
-        # Clean up the temporary file
+        # Clean up the temporary files
         os.remove(audio_file_path)
+        if trimmed_audio_file_path != audio_file_path:
+            os.remove(trimmed_audio_file_path)
 
         return ResponseSchema(
             success=True,
@@ -95,10 +158,11 @@ async def process_audio(request: AudioProcessRequest):
             message="Audio processed successfully",
             status_code=status.HTTP_200_OK,
             s3_url=storage_uri,
+            index_url=index_uri,
         )
     except HTTPException as http_exception:
         return JSONResponse(
-            status_code=http_exception.status_code, content=json.loads(http_exception.detail)
+            status_code=http_exception.status_code, content=get_error_content(http_exception)
         )
     except Exception as e:
         return JSONResponse(
@@ -110,3 +174,73 @@ async def process_audio(request: AudioProcessRequest):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             ).json(),
         )
+
+
+@router.get(
+    "/transcripts/{log_id}/segments",
+    response_model=SegmentsResponseSchema,
+    dependencies=[Depends(api_key_auth)],
+)
+async def get_transcript_segments(
+    log_id: str, start: int = 0, end: Optional[int] = None, at_seconds: Optional[float] = None
+):
+    """
+    Endpoint to fetch segments `start` to `end` (inclusive) of a structured transcript.
+    With `at_seconds`, the range starts at the segment covering that time instead of `start`.
+    Only the bytes of the requested segments are read from S3.
+    """
+    try:
+        index_content = await get_optional_file_from_s3(TRANSCRIPTS_PREFIX, f"{log_id}.index.json")
+        if index_content is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=SegmentsResponseSchema(
+                    success=False,
+                    code="NOT_FOUND",
+                    message=f"No segment index found for transcript '{log_id}'",
+                    status_code=status.HTTP_404_NOT_FOUND,
+                ).json(),
+            )
+        transcript_index = json.loads(index_content)
+        if at_seconds is not None:
+            start = find_segment_at(transcript_index, at_seconds)
+        try:
+            first_byte, last_byte = get_segment_byte_range(
+                transcript_index, start, start if end is None else end
+            )
+        except IndexError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=SegmentsResponseSchema(
+                    success=False,
+                    code="WRONG_INPUT",
+                    message=str(e),
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                ).json(),
+            )
+
+        segment_content = await get_file_range_from_s3(
+            TRANSCRIPTS_PREFIX, f"{log_id}.jsonl", first_byte, last_byte
+        )
+        return SegmentsResponseSchema(
+            success=True,
+            code="SUCCESS",
+            message="Transcript segments fetched successfully",
+            status_code=status.HTTP_200_OK,
+            body=decode_segments(segment_content),
+        )
+    except HTTPException as http_exception:
+        return JSONResponse(
+            status_code=http_exception.status_code,
+            content=get_error_content(http_exception, SegmentsResponseSchema),
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content=SegmentsResponseSchema(
+                success=False,
+                code="INTERNAL_SERVER_ERROR",
+                message=str(e),
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            ).json(),
+        )
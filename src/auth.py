@@ -5,10 +5,6 @@ from fastapi import HTTPException
 
 from pydantic import BaseModel
 
-from dotenv import load_dotenv
-
-load_dotenv()
-
 
 class ResponseSchema(BaseModel):
     success: bool
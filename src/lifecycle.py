@@ -0,0 +1,118 @@
+import asyncio
+import importlib
+import os
+import time
+from typing import Optional
+
+import httpx
+
+_ready = False
+_draining = False
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def is_ready() -> bool:
+    return _ready and not _draining
+
+
+def is_draining() -> bool:
+    return _draining
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared HTTP client so downloads reuse pooled connections.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient()
+    return _http_client
+
+
+def _warmup_sync():
+    """
+    Initialize clients, prompts and cold-path imports that requests would otherwise
+    set up lazily. A failing step is reported and left to be retried on first use.
+    """
+    from utils import transcript_analyser
+    from utils.download_google_meet_recordings import (
+        get_drive_service,
+        has_usable_drive_credentials,
+    )
+    from utils.gemini_client import get_gemini_client
+    from utils.s3_utils import get_s3_client
+
+    steps = {
+        "gemini client": get_gemini_client,
+        "s3 client": get_s3_client,
+        "system prompt": lambda: transcript_analyser.load_prompt("prompts/full_system_prompt.md"),
+        "sprint meeting template": lambda: transcript_analyser.get_prompt_template(
+            "prompts/sprint_meeting_info_template.txt"
+        ),
+        "compact sprint meeting template": lambda: transcript_analyser.get_prompt_template(
+            "prompts/sprint_meeting_info_compact_template.txt"
+        ),
+        "audio libraries": lambda: importlib.import_module("pydub"),
+        "numpy": lambda: importlib.import_module("numpy"),
+        "drive api libraries": lambda: importlib.import_module("googleapiclient.discovery"),
+    }
+    # Drive authentication falls back to a blocking interactive flow unless the stored
+    # credentials are valid or refreshable, so only warm it up in that case
+    try:
+        drive_credentials_usable = has_usable_drive_credentials()
+    except Exception as e:
+        drive_credentials_usable = False
+        print(f"Warmup: drive credentials check failed: {e}")
+    if drive_credentials_usable:
+        steps["drive service"] = get_drive_service
+    else:
+        print("Warmup: skipping drive service, no usable stored credentials")
+
+    for name, step in steps.items():
+        started_at = time.perf_counter()
+        try:
+            step()
+            print(f"Warmup: {name} ready in {time.perf_counter() - started_at:.2f}s")
+        except Exception as e:
+            print(f"Warmup: {name} failed: {e}")
+
+
+async def warmup():
+    """
+    Run the warmup steps off the event loop and mark the worker ready once done.
+    """
+    global _ready
+    started_at = time.perf_counter()
+    get_http_client()
+    await asyncio.to_thread(_warmup_sync)
+    _ready = True
+    print(f"Warmup completed in {time.perf_counter() - started_at:.2f}s")
+
+
+def get_drain_timeout() -> float:
+    """
+    Seconds in-flight requests get to finish once shutdown starts.
+    """
+    return float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT_SECONDS", "30"))
+
+
+def start_draining():
+    """
+    Stop reporting ready and reject new API requests. Called from the server's signal
+    handler, before uvicorn stops accepting connections.
+    """
+    global _draining
+    if not _draining:
+        _draining = True
+        print("Shutdown: draining, no longer accepting new API requests")
+
+
+async def shutdown():
+    """
+    Release shared resources once uvicorn has finished the in-flight requests.
+    """
+    global _http_client
+    start_draining()
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
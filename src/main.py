@@ -1,8 +1,21 @@
-from fastapi import FastAPI
+import time
+
+started_at = time.perf_counter()
+
+import asyncio
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+
+# Load the environment once, before any module reads its configuration
+load_dotenv()
+
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import Depends
 from api import analyze_transcript, process_audio
 from auth import api_key_auth
+import lifecycle
 
 from fastapi.responses import JSONResponse
 from fastapi import HTTPException
@@ -12,9 +25,48 @@ async def http_exception_handler(request, exc: HTTPException):
     return JSONResponse(exc.detail.model_dump(mode="json"), status_code=exc.status_code)
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print(f"Startup: application loaded in {time.perf_counter() - started_at:.2f}s")
+    # Warm up in the background so liveness is served while clients are initialized
+    warmup_task = asyncio.create_task(lifecycle.warmup())
+    yield
+    warmup_task.cancel()
+    await lifecycle.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 app.add_exception_handler(HTTPException, http_exception_handler)
 
+first_request_served = False
+
+
+@app.middleware("http")
+async def guard_api_requests(request: Request, call_next):
+    """
+    Reject API requests while draining and report first-request latency.
+    Registered before CORS so its responses still get the CORS headers.
+    """
+    global first_request_served
+    if not request.url.path.startswith("/api/"):
+        return await call_next(request)
+    if lifecycle.is_draining():
+        return JSONResponse(
+            {"message": "Server is shutting down"},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+    request_started_at = time.perf_counter()
+    response = await call_next(request)
+    if not first_request_served:
+        first_request_served = True
+        print(
+            f"First request to {request.url.path} served in "
+            f"{time.perf_counter() - request_started_at:.2f}s"
+        )
+    return response
+
+
 # Configure CORS (Cross-Origin Resource Sharing)
 # This allows your frontend to make requests to the API
 app.add_middleware(
@@ -35,3 +87,18 @@ app.include_router(analyze_transcript.router, prefix="/api/v1")
 @app.get("/", dependencies=[Depends(api_key_auth)])
 async def read_root():
     return {"message": "Welcome to Eye of Horus!"}
+
+
+@app.get("/health/live")
+async def liveness():
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness():
+    if not lifecycle.is_ready():
+        return JSONResponse(
+            {"status": "draining" if lifecycle.is_draining() else "warming_up"},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+    return {"status": "ready"}
@@ -0,0 +1,32 @@
+import os
+
+import uvicorn
+
+import lifecycle
+from main import app
+
+
+class Server(uvicorn.Server):
+    """
+    Uvicorn server that marks the worker as draining as soon as a shutdown signal
+    arrives, so /health/ready turns 503 and new API requests are rejected while
+    in-flight ones finish.
+    """
+
+    def handle_exit(self, sig, frame):
+        lifecycle.start_draining()
+        super().handle_exit(sig, frame)
+
+
+def main():
+    config = uvicorn.Config(
+        app,
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        timeout_graceful_shutdown=int(lifecycle.get_drain_timeout()),
+    )
+    Server(config).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,23 @@
-import os
+from typing import List
 
-from google import genai
+from pydantic import BaseModel
 from fastapi import HTTPException
-from google.api_core.exceptions import TooManyRequests
-from dotenv import load_dotenv
 
-load_dotenv()
+from utils.gemini_client import get_gemini_client
+
+
+class TranscriptSegment(BaseModel):
+    speaker: str
+    start: float
+    end: float
+    text: str
+
+
+TRANSCRIPTION_PROMPT = "The given audio is in hinglish with a mix of hindi and english. Your task it to write everything in Hinglish format with latin script."
+SEGMENTS_PROMPT = (
+    " Split the transcript into segments, one per speaker turn, with the speaker label"
+    " (e.g. SPEAKER_01) and the start and end time of the segment in seconds from the beginning of the audio."
+)
 
 
 def transcribe_audio_gemini(file_path: str) -> str:
@@ -21,15 +33,64 @@ def transcribe_audio_gemini(file_path: str) -> str:
     Raises:
         HTTPException: If there are issues with the Gemini API (e.g., invalid API key, rate limiting).
     """
+    from google.api_core.exceptions import TooManyRequests
+
     try:
-        client = genai.Client(api_key=os.getenv("GOOGLE_GEMINI_API_KEY"))
+        client = get_gemini_client()
         audio_data = client.files.upload(file=file_path)
-        prompt = "The given audio is in hinglish with a mix of hindi and english. Your task it to write everything in Hinglish format with latin script."
         response = client.models.generate_content(
-            model="gemini-2.0-flash", contents=[prompt, audio_data]
+            model="gemini-2.0-flash", contents=[TRANSCRIPTION_PROMPT, audio_data]
         )
         return response.text
     except TooManyRequests as e:
         raise HTTPException(status_code=429, detail=f"Gemini API rate limit exceeded: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to initialize Gemini API: {e}")
+
+
+def transcribe_audio_segments_gemini(file_path: str) -> List[dict]:
+    """
+    Transcribes an audio file into speaker segments using the Gemini API.
+
+    Args:
+        file_path: The path to the audio file.
+
+    Returns:
+        The transcript as a list of segments with `speaker`, `start`, `end` (seconds) and `text`.
+
+    Raises:
+        HTTPException: If there are issues with the Gemini API (e.g., invalid API key, rate limiting)
+            or the response contains no parseable segments (e.g., truncated output).
+    """
+    from google.api_core.exceptions import TooManyRequests
+    from google.genai import types
+
+    try:
+        client = get_gemini_client()
+        audio_data = client.files.upload(file=file_path)
+        response = client.models.generate_content(
+            model="gemini-2.0-flash",
+            contents=[TRANSCRIPTION_PROMPT + SEGMENTS_PROMPT, audio_data],
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=list[TranscriptSegment],
+            ),
+        )
+        segments = response.to_json_dict().get("parsed")
+    except TooManyRequests as e:
+        raise HTTPException(status_code=429, detail=f"Gemini API rate limit exceeded: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to initialize Gemini API: {e}")
+
+    # Long meetings can overrun the output limit, truncating the JSON so nothing is parsed
+    if not segments:
+        finish_reason = response.candidates[0].finish_reason if response.candidates else None
+        raise HTTPException(
+            status_code=500,
+            detail=(
+                "Gemini returned no parseable transcript segments "
+                f"(finish reason: {finish_reason}); the recording may be too long for "
+                "the segments format, use the text format instead"
+            ),
+        )
+    return segments
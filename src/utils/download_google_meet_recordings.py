@@ -1,12 +1,7 @@
 import os
 import os.path
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
 import io
-from pydub import AudioSegment
+from functools import lru_cache
 
 # Define the OAuth 2.0 scope for read-only access to Google Drive
 SCOPES = ["https://www.googleapis.com/auth/drive.readonly"]
@@ -14,6 +9,11 @@ SCOPES = ["https://www.googleapis.com/auth/drive.readonly"]
 
 def authenticate_drive():
     """Authenticate with Google Drive API and return the service object."""
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from googleapiclient.discovery import build
+
     creds = None
     if os.path.exists("token.json"):
         creds = Credentials.from_authorized_user_file("token.json", SCOPES)
@@ -29,6 +29,25 @@ def authenticate_drive():
     return service
 
 
+def has_usable_drive_credentials():
+    """Check if token.json holds credentials usable without the interactive flow."""
+    from google.oauth2.credentials import Credentials
+
+    if not os.path.exists("token.json"):
+        return False
+    try:
+        creds = Credentials.from_authorized_user_file("token.json", SCOPES)
+    except Exception:
+        return False
+    return creds.valid or bool(creds.expired and creds.refresh_token)
+
+
+@lru_cache(maxsize=1)
+def get_drive_service():
+    """Return a Drive service shared across requests; credentials refresh on use."""
+    return authenticate_drive()
+
+
 def find_meet_recordings_folder(service):
     """Find the 'Meet Recordings' folder in Google Drive."""
     query = "name='Travel' and mimeType='application/vnd.google-apps.folder'"
@@ -76,6 +95,8 @@ def download_recording_file(service, file_id, mime_type=".mp4", download_path="d
         print(f"File '{file_name}' already exists, skipping download.")
         return output_file
 
+    from googleapiclient.http import MediaIoBaseDownload
+
     # Download the file
     request = service.files().get_media(fileId=file_id)
     fh = io.FileIO(output_file, "wb")
@@ -92,6 +113,8 @@ def download_recording_file(service, file_id, mime_type=".mp4", download_path="d
 
 def convert_video_to_audio(video_path, audio_path="downloads", bitrate="320k"):
     """Convert a video file to high-quality MP3 audio."""
+    from pydub import AudioSegment
+
     if not os.path.exists(audio_path):
         os.makedirs(audio_path)
 
@@ -0,0 +1,13 @@
+import os
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1)
+def get_gemini_client():
+    """
+    Return the shared Gemini client, creating it on first use.
+    `google.genai` is imported here so that importing the API modules stays cheap.
+    """
+    from google import genai
+
+    return genai.Client(api_key=os.getenv("GOOGLE_GEMINI_API_KEY"))
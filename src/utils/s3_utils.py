@@ -1,22 +1,39 @@
 import os
-import boto3
+from functools import lru_cache
+from typing import Optional
 from fastapi import HTTPException
-from dotenv import load_dotenv
-
-load_dotenv()
 
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 AWS_REGION = os.getenv("AWS_REGION", "us-west-2")
 AWS_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
 
-# Initialize S3 client
-s3 = boto3.client(
-    "s3",
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    region_name=AWS_REGION,
-)
+# Without s3:ListBucket, reading a missing key fails with AccessDenied instead of NoSuchKey
+MISSING_KEY_ERROR_CODES = ("NoSuchKey", "AccessDenied")
+
+
+@lru_cache(maxsize=1)
+def is_missing_key_error(error: Exception) -> bool:
+    """
+    Whether a botocore error means the key is missing or not readable by this role.
+    """
+    error_code = getattr(error, "response", {}).get("Error", {}).get("Code")
+    return error_code in MISSING_KEY_ERROR_CODES
+
+
+@lru_cache(maxsize=1)
+def get_s3_client():
+    """
+    Return the shared S3 client, creating it on first use.
+    """
+    import boto3
+
+    return boto3.client(
+        "s3",
+        aws_access_key_id=AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+        region_name=AWS_REGION,
+    )
 
 
 async def get_file_from_s3(bucket_name: str, key: str) -> bytes:
@@ -34,6 +51,7 @@ async def get_file_from_s3(bucket_name: str, key: str) -> bytes:
         HTTPException: If there are issues retrieving the file from S3.
     """
     try:
+        s3 = get_s3_client()
         response = s3.get_object(Bucket=bucket_name, Key=key)
         return response["Body"].read()
     except Exception as e:
@@ -56,6 +74,7 @@ async def store_file_in_s3(prefix: str, file_name: str, file_content: bytes) ->
         HTTPException: If there are issues storing the file in S3.
     """
     try:
+        s3 = get_s3_client()
         key = os.path.join(prefix, file_name)
         # Store the file in S3
         s3.put_object(Bucket=AWS_BUCKET_NAME, Key=key, Body=bytes(file_content))
@@ -66,3 +85,57 @@ async def store_file_in_s3(prefix: str, file_name: str, file_content: bytes) ->
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error storing file in S3: {e}")
+
+
+async def get_optional_file_from_s3(prefix: str, file_name: str) -> Optional[bytes]:
+    """
+    Retrieves a file from the default bucket, returning None if it does not exist
+    or is not readable.
+
+    Args:
+        prefix: The key prefix of the file.
+        file_name: The name of the file under the prefix.
+
+    Returns:
+        The file content as bytes, or None if the key is missing.
+
+    Raises:
+        HTTPException: If there are issues retrieving the file from S3.
+    """
+    try:
+        s3 = get_s3_client()
+        key = os.path.join(prefix, file_name)
+        response = s3.get_object(Bucket=AWS_BUCKET_NAME, Key=key)
+        return response["Body"].read()
+    except Exception as e:
+        if is_missing_key_error(e):
+            return None
+        raise HTTPException(status_code=500, detail=f"Error retrieving file from S3: {e}")
+
+
+async def get_file_range_from_s3(prefix: str, file_name: str, start: int, end: int) -> bytes:
+    """
+    Retrieves a byte range of a file from the default bucket using an HTTP range read.
+
+    Args:
+        prefix: The key prefix of the file.
+        file_name: The name of the file under the prefix.
+        start: The first byte to read.
+        end: The last byte to read (inclusive).
+
+    Returns:
+        The requested bytes.
+
+    Raises:
+        HTTPException: 404 if the file is missing or not readable, 500 for other issues
+            retrieving the range from S3.
+    """
+    try:
+        s3 = get_s3_client()
+        key = os.path.join(prefix, file_name)
+        response = s3.get_object(Bucket=AWS_BUCKET_NAME, Key=key, Range=f"bytes={start}-{end}")
+        return response["Body"].read()
+    except Exception as e:
+        if is_missing_key_error(e):
+            raise HTTPException(status_code=404, detail=f"File not found in S3: {key}")
+        raise HTTPException(status_code=500, detail=f"Error retrieving file range from S3: {e}")
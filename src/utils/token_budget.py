@@ -0,0 +1,60 @@
+import os
+from typing import Dict
+
+from utils.gemini_client import get_gemini_client
+
+FAST_MODEL = "gemini-2.0-flash"
+THINKING_MODEL = "gemini-2.5-pro-exp-03-25"
+
+# Rough average for Gemini tokenizers on mixed English / Hinglish text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap local estimate of the number of tokens in `text`.
+    """
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def count_tokens(text: str, model: str = THINKING_MODEL) -> int:
+    """
+    Count the tokens in `text`. Uses the Gemini count_tokens API when TOKEN_COUNT_MODE is
+    "api" (one extra round trip per call), the local estimate otherwise or on failure.
+    """
+    if os.getenv("TOKEN_COUNT_MODE", "estimate") != "api":
+        return estimate_tokens(text)
+    try:
+        return get_gemini_client().models.count_tokens(model=model, contents=text).total_tokens
+    except Exception as e:
+        print(f"Token count via API failed, using estimate: {e}")
+        return estimate_tokens(text)
+
+
+def get_token_report(system_prompt: str, sprint_context: str, transcript: str) -> Dict[str, int]:
+    """
+    Count the input tokens of an analysis request. Each part uses the local estimate; with
+    TOKEN_COUNT_MODE=api the total is counted by Gemini in a single call.
+    """
+    report = {
+        "system_prompt": estimate_tokens(system_prompt),
+        "sprint_context": estimate_tokens(sprint_context),
+        "transcript": estimate_tokens(transcript),
+    }
+    if os.getenv("TOKEN_COUNT_MODE", "estimate") == "api":
+        report["total"] = count_tokens("\n".join([system_prompt, sprint_context, transcript]))
+    else:
+        report["total"] = sum(report.values())
+    return report
+
+
+def select_model(total_tokens: int) -> str:
+    """
+    Route requests below MODEL_ROUTING_TOKEN_THRESHOLD input tokens to the fast model and
+    larger ones to the thinking model. Routing is opt-in: the default threshold of 0
+    always uses the thinking model.
+    """
+    threshold = int(os.getenv("MODEL_ROUTING_TOKEN_THRESHOLD", "0"))
+    if total_tokens < threshold:
+        return os.getenv("GEMINI_FAST_MODEL", FAST_MODEL)
+    return os.getenv("GEMINI_THINKING_MODEL", THINKING_MODEL)
@@ -1,13 +1,17 @@
-from google import genai
-from google.genai import types
-
-from typing import List
+from typing import List, Optional, Tuple
 from pydantic import BaseModel
 from jinja2 import Template
-import os
+from functools import lru_cache
+import hashlib
+import json
+import re
 
 from enum import Enum
 import datetime
+import time
+
+from utils.gemini_client import get_gemini_client
+from utils import token_budget
 
 
 class ActionType(str, Enum):
@@ -17,6 +21,16 @@ class ActionType(str, Enum):
     NONE = "NONE"
 
 
+class SprintContextEncoding(str, Enum):
+    FULL = "full"
+    COMPACT = "compact"
+
+
+# Fields of the normalized sprint details holding member ids
+MEMBER_FIELDS = ("product_manager", "developers", "qa", "owned_by")
+MEMBER_ALIAS_PATTERN = re.compile(r"\bM\d+\b")
+
+
 class FieldsToUpdate(BaseModel):
     field_name: str
     new_value: str
@@ -36,14 +50,10 @@ class TicketAction(BaseModel):
     action_details: ActionDetails
     confidence_score: float
     transcript_context: str
+    transcript_segment_ids: List[int]
     reasoning: str
 
 
-from dotenv import load_dotenv
-
-load_dotenv()
-
-
 def get_sprint_details(sprint_details: List[dict]) -> List[dict]:
     result = []
     for work_item in sprint_details:
@@ -64,40 +74,313 @@ def get_sprint_details(sprint_details: List[dict]) -> List[dict]:
     return result
 
 
+@lru_cache(maxsize=None)
+def load_prompt(path: str) -> str:
+    """
+    Read a prompt file once and keep it in memory for later requests.
+    """
+    return "".join(open(path))
+
+
+@lru_cache(maxsize=None)
+def get_prompt_template(path: str) -> Template:
+    return Template(load_prompt(path))
+
+
 def get_sprint_meeting_prompt(sprint_members, sprint_details):
     """ 
     Create prompt to include sprint members, and all current sprint issues and tickets.
     """
-    template = Template("".join(open("prompts/sprint_meeting_info_template.txt")))
+    template = get_prompt_template("prompts/sprint_meeting_info_template.txt")
     prompt = template.render(members=sprint_members, sprint_details=sprint_details)
     return prompt
 
 
-def analyze_transcription(transcription_text: str, pod_members: dict, sprint_details: dict):
+def get_member_aliases(pod_members: List[dict], sprint_details: List[dict]) -> dict:
     """
-    Analyze the transcription text and generate content using the Gemini API.
+    Assign short aliases (M1, M2, ...) to every member id in the pod and sprint details.
     """
-    # Initialize the client
-    client = genai.Client(api_key=os.getenv("GOOGLE_GEMINI_API_KEY"))
+    member_ids = [member.get("id", "") for member in pod_members]
+    for item in sprint_details:
+        for field in MEMBER_FIELDS:
+            value = item.get(field) or []
+            member_ids.extend([value] if isinstance(value, str) else value)
+
+    aliases = {}
+    for member_id in member_ids:
+        if member_id and member_id not in aliases:
+            aliases[member_id] = f"M{len(aliases) + 1}"
+    return aliases
+
+
+def get_compact_sprint_meeting_prompt(sprint_members, sprint_details, aliases: dict):
+    """
+    Render the sprint context as compact tables, with member ids replaced by their aliases.
+    """
+    members = [{**member, "id": aliases.get(member.get("id"), "")} for member in sprint_members]
+    aliased_details = []
+    for item in sprint_details:
+        aliased_item = dict(item)
+        for field in MEMBER_FIELDS:
+            value = item.get(field)
+            if isinstance(value, list):
+                aliased_item[field] = [aliases.get(member_id, member_id) for member_id in value]
+            else:
+                aliased_item[field] = aliases.get(value, value)
+        aliased_details.append(aliased_item)
+
+    template = get_prompt_template("prompts/sprint_meeting_info_compact_template.txt")
+    return template.render(members=members, sprint_details=aliased_details)
+
+
+def resolve_member_aliases(
+    actions: List[dict], aliases: dict, pod_members: List[dict]
+) -> List[dict]:
+    """
+    Map member aliases in the returned actions back to the original members: ids in
+    `tag_users` and member fields, names in free text that is posted or read by people.
+    The verbatim `transcript_context` quote is left untouched.
+    """
+    member_ids = {alias: member_id for member_id, alias in aliases.items()}
+    member_names = {member.get("id"): member.get("name") for member in pod_members}
+    # Members only known from the sprint details have no name, fall back to their id
+    alias_names = {
+        alias: member_names.get(member_id) or member_id for alias, member_id in member_ids.items()
+    }
+
+    def resolve(value: str) -> str:
+        return ", ".join(member_ids.get(part.strip(), part.strip()) for part in value.split(","))
+
+    def resolve_text(text: str) -> str:
+        return MEMBER_ALIAS_PATTERN.sub(lambda match: alias_names.get(match[0], match[0]), text)
+
+    if not member_ids:
+        return actions
+    for action in actions:
+        details = action["action_details"]
+        details["tag_users"] = [member_ids.get(user, user) for user in details["tag_users"]]
+        for field in details["fields_to_update"]:
+            if field["field_name"] in MEMBER_FIELDS:
+                field["new_value"] = resolve(field["new_value"])
+        # Free text is posted or shown as written, so aliases there become member names
+        for key in ("comment_text", "reason"):
+            details[key] = resolve_text(details[key])
+        action["reasoning"] = resolve_text(action["reasoning"])
+    return actions
+
+
+@lru_cache(maxsize=1)
+def get_analysis_version() -> str:
+    """
+    Fingerprint of the prompts and response schema. Snapshots written under another
+    version are not reused.
+    """
+    fingerprint = hashlib.sha256()
+    for path in (
+        "prompts/full_system_prompt.md",
+        "prompts/sprint_meeting_info_template.txt",
+        "prompts/sprint_meeting_info_compact_template.txt",
+    ):
+        fingerprint.update(load_prompt(path).encode("utf-8"))
+    fingerprint.update(json.dumps(TicketAction.model_json_schema(), sort_keys=True).encode("utf-8"))
+    return fingerprint.hexdigest()[:16]
+
+
+def get_transcript_key(transcription_text: str) -> str:
+    """
+    Stable key identifying a transcript, used to store its analysis snapshot.
+    """
+    return hashlib.sha256(transcription_text.encode("utf-8")).hexdigest()
+
+
+def get_changed_tickets(previous_details: List[dict], current_details: List[dict]) -> set:
+    """
+    Compare two normalized sprint detail lists (output of `get_sprint_details`) and
+    return the ticket numbers that are new or whose fields changed.
+    """
+    previous_by_ticket = {item["ticket_number"]: item for item in previous_details}
+    return {
+        item["ticket_number"]
+        for item in current_details
+        if previous_by_ticket.get(item["ticket_number"]) != item
+    }
+
+
+def compare_sprint_context_encodings(pod_members: List[dict], sprint_details: List[dict]) -> dict:
+    """
+    Estimate the sprint context tokens of each encoding for normalized sprint details.
+    Uses the local estimate so the comparison adds no API calls.
+    """
+    aliases = get_member_aliases(pod_members, sprint_details)
+    full_tokens = token_budget.estimate_tokens(
+        get_sprint_meeting_prompt(pod_members, sprint_details)
+    )
+    compact_tokens = token_budget.estimate_tokens(
+        get_compact_sprint_meeting_prompt(pod_members, sprint_details, aliases)
+    )
+    return {
+        SprintContextEncoding.FULL.value: full_tokens,
+        SprintContextEncoding.COMPACT.value: compact_tokens,
+        "reduction": round(1 - compact_tokens / full_tokens, 3) if full_tokens else 0.0,
+    }
+
+
+def generate_ticket_actions(
+    transcription_text: str,
+    pod_members,
+    sprint_details: List[dict],
+    focus_tickets=None,
+    encoding: SprintContextEncoding = SprintContextEncoding.FULL,
+) -> Tuple[List[dict], str]:
+    """
+    Run the Gemini analysis over already normalized sprint details.
+    When `focus_tickets` is given, the prompt is narrowed to those tickets only.
+    The model is picked from the input token count of the request.
+
+    Returns the actions and the model that produced them.
+    """
+    from google.genai import types
+
+    # Get the shared client
+    client = get_gemini_client()
 
     # Define the prompt
-    system_prompt = "".join(open("prompts/full_system_prompt.md"))
+    system_prompt = load_prompt("prompts/full_system_prompt.md")
 
-    # Gather sprint details
-    sprint_details = get_sprint_details(sprint_details)
-    sprint_meeting_prompt = get_sprint_meeting_prompt(pod_members, sprint_details)
+    aliases = {}
+    if encoding == SprintContextEncoding.COMPACT:
+        aliases = get_member_aliases(pod_members, sprint_details)
+        sprint_meeting_prompt = get_compact_sprint_meeting_prompt(
+            pod_members, sprint_details, aliases
+        )
+    else:
+        sprint_meeting_prompt = get_sprint_meeting_prompt(pod_members, sprint_details)
     today_date = f"Today's date is {datetime.datetime.now().strftime('%Y-%m-%d')}"
-    transcription_text = "\n".join([today_date, sprint_meeting_prompt, transcription_text])
+    prompt_parts = [today_date, sprint_meeting_prompt]
+    if focus_tickets is not None:
+        prompt_parts.append(
+            "Only the tickets listed above changed since the last analysis of this meeting. "
+            "Return actions only for these tickets: " + ", ".join(sorted(focus_tickets))
+        )
+    contents = "\n".join(prompt_parts + [transcription_text])
+
+    # Small requests go to the fast model, large ones to the thinking model
+    token_report = token_budget.get_token_report(
+        system_prompt, "\n".join(prompt_parts), transcription_text
+    )
+    model = token_budget.select_model(token_report["total"])
 
     # Generate content
+    started_at = time.perf_counter()
     response = client.models.generate_content(
-        model="gemini-2.5-pro-exp-03-25",  # thinking model compulsory
-        contents=transcription_text,
+        model=model,
+        contents=contents,
         config=types.GenerateContentConfig(
             system_instruction=system_prompt,
             response_mime_type="application/json",
             response_schema=list[TicketAction],
         ),
     )
+    latency = time.perf_counter() - started_at
+    encoding_tokens = compare_sprint_context_encodings(pod_members, sprint_details)
+    print(
+        f"Analysis: encoding={encoding.value} model={model} input_tokens={token_report} "
+        f"latency={latency:.2f}s sprint_context_tokens_by_encoding={encoding_tokens}"
+    )
+
+    actions = resolve_member_aliases(response.to_json_dict()["parsed"], aliases, pod_members)
+    return actions, model
+
+
+def analyze_transcription(
+    transcription_text: str,
+    pod_members: dict,
+    sprint_details: dict,
+    encoding: SprintContextEncoding = SprintContextEncoding.FULL,
+):
+    """
+    Analyze the transcription text and generate content using the Gemini API.
+    """
+    # Gather sprint details
+    sprint_details = get_sprint_details(sprint_details)
+    actions, _ = generate_ticket_actions(
+        transcription_text, pod_members, sprint_details, encoding=encoding
+    )
+    return actions
+
+
+def analyze_transcription_incremental(
+    transcription_text: str,
+    pod_members: List[dict],
+    sprint_details: List[dict],
+    snapshot: Optional[dict] = None,
+    encoding: SprintContextEncoding = SprintContextEncoding.FULL,
+) -> dict:
+    """
+    Analyze the transcription, reusing the actions stored in `snapshot` from a previous
+    analysis of the same transcript. Only tickets whose sprint fields changed are sent
+    back to the model; actions for unchanged tickets are reused as-is.
+
+    Returns a new snapshot with the keys `version`, `pod_members`, `sprint_details`,
+    `actions` and `models` (the model that produced the actions of each ticket).
+    """
+    sprint_details = get_sprint_details(sprint_details)
+    version = get_analysis_version()
+
+    # Members are part of every ticket's context, so any change there needs a full run,
+    # as do snapshots written with other prompts or response schema
+    if (
+        not snapshot
+        or snapshot.get("version") != version
+        or snapshot.get("pod_members") != pod_members
+    ):
+        actions, model = generate_ticket_actions(
+            transcription_text, pod_members, sprint_details, encoding=encoding
+        )
+        return {
+            "version": version,
+            "pod_members": pod_members,
+            "sprint_details": sprint_details,
+            "actions": actions,
+            "models": {item["ticket_number"]: model for item in sprint_details},
+        }
+
+    changed_tickets = get_changed_tickets(snapshot["sprint_details"], sprint_details)
+    current_tickets = {item["ticket_number"] for item in sprint_details}
+
+    # Reuse stored actions for tickets that are still in the sprint and did not change
+    actions = [
+        action
+        for action in snapshot["actions"]
+        if action["ticket_number"] in current_tickets
+        and action["ticket_number"] not in changed_tickets
+    ]
+    previous_models = snapshot.get("models", {})
+    models = {
+        ticket_number: previous_models[ticket_number]
+        for ticket_number in current_tickets - changed_tickets
+        if ticket_number in previous_models
+    }
+    if changed_tickets:
+        changed_details = [
+            item for item in sprint_details if item["ticket_number"] in changed_tickets
+        ]
+        new_actions, model = generate_ticket_actions(
+            transcription_text,
+            pod_members,
+            changed_details,
+            focus_tickets=changed_tickets,
+            encoding=encoding,
+        )
+        actions.extend(
+            action for action in new_actions if action["ticket_number"] in changed_tickets
+        )
+        models.update({ticket_number: model for ticket_number in changed_tickets})
 
-    return response.to_json_dict()["parsed"]
+    return {
+        "version": version,
+        "pod_members": pod_members,
+        "sprint_details": sprint_details,
+        "actions": actions,
+        "models": models,
+    }
@@ -0,0 +1,76 @@
+import json
+from enum import Enum
+from typing import List, Tuple
+
+
+class TranscriptFormat(str, Enum):
+    TEXT = "text"
+    SEGMENTS = "segments"
+
+
+INDEX_VERSION = 1
+
+
+def encode_segments(segments: List[dict]) -> Tuple[bytes, dict]:
+    """
+    Serialize transcript segments as JSON lines and build the offset index for them.
+
+    Each index entry is `[offset, length, start, end, speaker]`, so a single segment can be
+    fetched with a byte-range read and segments can be located by time without downloading
+    the transcript.
+    """
+    content = bytearray()
+    entries = []
+    for segment_id, segment in enumerate(segments):
+        line = json.dumps({"id": segment_id, **segment}, ensure_ascii=False).encode("utf-8") + b"\n"
+        entries.append([len(content), len(line), segment["start"], segment["end"], segment["speaker"]])
+        content.extend(line)
+    return bytes(content), {"version": INDEX_VERSION, "segments": entries}
+
+
+def decode_segments(content: bytes) -> List[dict]:
+    """
+    Parse JSON-lines segment content, as stored or as returned by a range read.
+    """
+    return [json.loads(line) for line in content.decode("utf-8").splitlines() if line.strip()]
+
+
+def get_segment_byte_range(index: dict, first_id: int, last_id: int) -> Tuple[int, int]:
+    """
+    Return the inclusive byte range covering segments `first_id` to `last_id`.
+    """
+    entries = index["segments"]
+    if not 0 <= first_id <= last_id < len(entries):
+        raise IndexError(f"Segment range {first_id}-{last_id} out of bounds ({len(entries)} segments)")
+    first_offset = entries[first_id][0]
+    last_offset, last_length = entries[last_id][0], entries[last_id][1]
+    return first_offset, last_offset + last_length - 1
+
+
+def find_segment_at(index: dict, seconds: float) -> int:
+    """
+    Return the id of the segment covering `seconds`, or of the last one starting before it.
+    """
+    segment_id = 0
+    for current_id, entry in enumerate(index["segments"]):
+        if entry[2] > seconds:
+            break
+        segment_id = current_id
+    return segment_id
+
+
+def format_timestamp(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def render_segments(segments: List[dict]) -> str:
+    """
+    Render segments as plain transcript text, prefixing every line with its segment id
+    so the analysis can point back to the segments it used.
+    """
+    return "\n".join(
+        f"[#{segment['id']} {format_timestamp(segment['start'])}] [{segment['speaker']}]: {segment['text']}"
+        for segment in segments
+    )
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import os
+import subprocess
+from typing import TYPE_CHECKING, List, Tuple
+
+# numpy is imported where it is used so importing the API modules stays cheap
+if TYPE_CHECKING:
+    import numpy as np
+
+# Frame size used for energy / zero-crossing analysis
+FRAME_MS = 30
+# Analysis runs on mono audio at this rate so every frame is exactly FRAME_MS long
+ANALYSIS_FRAME_RATE = 16000
+# Decoded PCM is streamed and analyzed in windows of this many frames (~60s)
+FRAMES_PER_WINDOW = 2000
+FFMPEG_BINARY = "ffmpeg"
+# Low energy frames with many zero crossings (fricatives like "s", "f") still count as speech
+ZCR_SPEECH_THRESHOLD = 0.25
+ZCR_ENERGY_MARGIN_DB = 10
+
+
+def get_frame_features(samples: np.ndarray, frame_len: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute per-frame energy (dBFS) and zero-crossing rate for normalized mono samples.
+    A trailing partial frame is zero padded.
+    """
+    import numpy as np
+
+    n_frames = -(-len(samples) // frame_len)
+    frames = np.zeros(n_frames * frame_len, dtype=np.float32)
+    frames[: len(samples)] = samples
+    frames = frames.reshape(n_frames, frame_len)
+
+    rms = np.sqrt(np.mean(frames**2, axis=1))
+    energy_db = 20 * np.log10(rms + 1e-10)
+    zcr = np.mean(np.diff(np.signbit(frames), axis=1), axis=1)
+    return energy_db, zcr
+
+
+def stream_pcm_windows(audio_path: str):
+    """
+    Decode the audio with ffmpeg as mono 16-bit PCM at ANALYSIS_FRAME_RATE and yield it
+    in windows of FRAMES_PER_WINDOW frames, so only one window is held in memory.
+    """
+    window_bytes = FRAMES_PER_WINDOW * ANALYSIS_FRAME_RATE * FRAME_MS // 1000 * 2
+    command = [
+        FFMPEG_BINARY,
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-i",
+        audio_path,
+        "-f",
+        "s16le",
+        "-ac",
+        "1",
+        "-ar",
+        str(ANALYSIS_FRAME_RATE),
+        "-",
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            window = process.stdout.read(window_bytes)
+            if not window:
+                break
+            yield window
+        stderr = process.stderr.read().decode("utf-8", "replace").strip()
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed to decode '{audio_path}': {stderr}")
+    finally:
+        # Stop ffmpeg if the consumer gave up before the end of the stream
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
+def detect_speech_frames(audio_path: str, threshold_dbfs: float) -> Tuple[np.ndarray, int]:
+    """
+    Classify every FRAME_MS frame of the audio as speech (True) or non-speech (False),
+    one streamed PCM window at a time.
+
+    Returns:
+        The per-frame speech flags and the duration of the audio in milliseconds.
+    """
+    import numpy as np
+
+    frame_len = ANALYSIS_FRAME_RATE * FRAME_MS // 1000
+
+    speech_flags = []
+    total_samples = 0
+    for window in stream_pcm_windows(audio_path):
+        samples = np.frombuffer(window, dtype="<i2").astype(np.float32) / 32768
+        total_samples += len(samples)
+
+        energy_db, zcr = get_frame_features(samples, frame_len)
+        speech_flags.append(
+            (energy_db > threshold_dbfs)
+            | ((energy_db > threshold_dbfs - ZCR_ENERGY_MARGIN_DB) & (zcr > ZCR_SPEECH_THRESHOLD))
+        )
+    flags = np.concatenate(speech_flags) if speech_flags else np.zeros(0, dtype=bool)
+    return flags, total_samples * 1000 // ANALYSIS_FRAME_RATE
+
+
+def cut_audio(audio_path: str, spans: List[Tuple[int, int]], output_path: str, bitrate: str):
+    """
+    Write only the given `(start_ms, end_ms)` spans of the audio to `output_path` with ffmpeg.
+    """
+    selection = "+".join(f"between(t,{start / 1000:.3f},{end / 1000:.3f})" for start, end in spans)
+    command = [
+        FFMPEG_BINARY,
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-y",
+        "-i",
+        audio_path,
+        "-af",
+        f"aselect='{selection}',asetpts=N/SR/TB",
+        "-b:a",
+        bitrate,
+        output_path,
+    ]
+    result = subprocess.run(command, capture_output=True)
+    if result.returncode != 0:
+        stderr = result.stderr.decode("utf-8", "replace").strip()
+        raise RuntimeError(f"ffmpeg failed to trim '{audio_path}': {stderr}")
+
+
+def get_speech_spans(
+    speech_flags: np.ndarray, min_silence_ms: int, padding_ms: int
+) -> List[Tuple[int, int]]:
+    """
+    Return the `(start_ms, end_ms)` spans to keep. Non-speech runs longer than
+    `min_silence_ms` are cut, leaving `padding_ms` of silence on each side.
+    """
+    import numpy as np
+
+    total_ms = len(speech_flags) * FRAME_MS
+    # Boundaries of non-speech runs as [start, end) in ms
+    edges = np.diff(np.concatenate(([0], (~speech_flags).astype(np.int8), [0])))
+    run_starts = (np.flatnonzero(edges == 1) * FRAME_MS).tolist()
+    run_ends = (np.flatnonzero(edges == -1) * FRAME_MS).tolist()
+
+    spans = []
+    keep_from = 0
+    for run_start, run_end in zip(run_starts, run_ends):
+        if run_end - run_start < min_silence_ms:
+            continue
+        # Leading and trailing silence need padding on the speech side only
+        cut_start = run_start + padding_ms if run_start > 0 else 0
+        cut_end = run_end - padding_ms if run_end < total_ms else total_ms
+        # The padding covers the whole run, so nothing is left to cut
+        if cut_end <= cut_start:
+            continue
+        if cut_start > keep_from:
+            spans.append((keep_from, cut_start))
+        keep_from = cut_end
+    if keep_from < total_ms:
+        spans.append((keep_from, total_ms))
+    return spans
+
+
+def map_to_original(seconds: float, time_map: List[List[float]]) -> float:
+    """
+    Map a timestamp in the trimmed audio back to the original recording.
+    `time_map` entries are `[trimmed_start, original_start, duration]` in seconds.
+    """
+    for trimmed_start, original_start, duration in time_map:
+        if seconds < trimmed_start + duration:
+            return original_start + max(seconds - trimmed_start, 0)
+    if not time_map:
+        return seconds
+    trimmed_start, original_start, duration = time_map[-1]
+    return original_start + seconds - trimmed_start
+
+
+def trim_non_speech(audio_path: str, bitrate="320k") -> Tuple[str, List[List[float]]]:
+    """
+    Cut non-speech spans out of an audio file before it is uploaded for transcription.
+    The audio is analyzed from a streamed ffmpeg decode and cut with ffmpeg, so it is
+    never held in memory in full.
+
+    Configured with VAD_ENABLED, VAD_THRESHOLD_DBFS, VAD_MIN_SILENCE_MS and VAD_PADDING_MS.
+
+    Returns:
+        The path of the trimmed audio (the input path when nothing was cut) and the time map
+        used by `map_to_original`.
+    """
+    if os.getenv("VAD_ENABLED", "true").lower() != "true":
+        return audio_path, []
+
+    threshold_dbfs = float(os.getenv("VAD_THRESHOLD_DBFS", "-45"))
+    min_silence_ms = int(os.getenv("VAD_MIN_SILENCE_MS", "2000"))
+    padding_ms = int(os.getenv("VAD_PADDING_MS", "300"))
+
+    speech_flags, duration_ms = detect_speech_frames(audio_path, threshold_dbfs)
+    # The last frame is zero padded, so clamp the spans to the real duration
+    spans = [
+        (start_ms, min(end_ms, duration_ms))
+        for start_ms, end_ms in get_speech_spans(speech_flags, min_silence_ms, padding_ms)
+        if start_ms < duration_ms
+    ]
+
+    time_map = []
+    trimmed_ms = 0
+    for start_ms, end_ms in spans:
+        time_map.append([trimmed_ms / 1000, start_ms / 1000, (end_ms - start_ms) / 1000])
+        trimmed_ms += end_ms - start_ms
+
+    # Nothing to cut, or no speech detected at all: upload the audio unchanged
+    if not spans or trimmed_ms >= duration_ms:
+        return audio_path, []
+
+    output_audio_file = os.path.splitext(audio_path)[0] + ".trimmed.mp3"
+    cut_audio(audio_path, spans, output_audio_file, bitrate)
+    print(
+        f"Trimmed '{audio_path}' from {duration_ms / 1000:.1f}s to {trimmed_ms / 1000:.1f}s "
+        f"of speech ({len(spans)} spans)"
+    )
+    return output_audio_file, time_map